@@ -1,16 +1,23 @@
 import datetime as dt
+import queue
+import re
+import threading
 import time
-from collections import defaultdict
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import lru_cache, wraps
 
 import pandas as pd
 import requests
+import requests_cache
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import altair as alt
 
 try:
     import streamlit as st
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 except ImportError:
     st = None
 
@@ -23,38 +30,192 @@ HEADERS = {
     "(KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
     "Referer": "https://gall.dcinside.com/board/lists?id=pizza",
     "Accept-Language": "ko-KR,ko;q=0.9,en-US;q=0.8,en;q=0.7",
+    "Accept-Encoding": "gzip, deflate",
 }
 REQUEST_TIMEOUT = (5, 20)
+PAGE_CONCURRENCY = 5  # 브랜드당 동시에 요청하는 페이지 수
+THROTTLE_RETRIES = 3  # 429/503을 받은 페이지를 속도를 줄인 뒤 다시 요청하는 횟수
 RETRY_STRATEGY = Retry(
     total=3,
     backoff_factor=1.5,
-    status_forcelist=[429, 500, 502, 503, 504],
+    # 429/503은 재시도하지 않고 _fetch_page에서 TokenBucket이 직접 속도를 줄인다.
+    # Retry-After가 있으면 urllib3가 status_forcelist와 무관하게 재시도하므로 그것도 끈다
+    status_forcelist=[500, 502, 504],
     allowed_methods=["GET"],
+    respect_retry_after_header=False,
     raise_on_status=False,
 )
-SESSION = requests.Session()
-SESSION.headers.update(HEADERS)
-SESSION.mount("https://", HTTPAdapter(max_retries=RETRY_STRATEGY))
-SESSION.mount("http://", HTTPAdapter(max_retries=RETRY_STRATEGY))
+# normalize_date에서 매번 만들지 않도록 미리 준비
+TODAY_STRINGS = frozenset({"오늘"})
+YESTERDAY_STRINGS = frozenset({"어제"})
+_DATE_FMTS = ("%Y.%m.%d", "%y.%m.%d", "%m.%d", "%m/%d", "%Y-%m-%d")
+_YEARLESS = frozenset({"%m.%d", "%m/%d"})
+_ONE_DAY = dt.timedelta(days=1)
+_strptime = dt.datetime.strptime
+
+# 게시글 행(tr.ub-content) 하나에서 글 번호와 작성일 셀까지 한 번에 매칭:
+#   <tr class="ub-content ..."> <td class="gall_num">123</td> ... <td class="gall_date" title="...">MM.DD</td>
+# title(YYYY-MM-DD HH:MM:SS)은 날짜 부분만 잡아 normalize_date 캐시가 같은 날끼리 적중하게 한다.
+# 공지/설문처럼 글 번호가 숫자가 아닌 행은 날짜 순서와 무관하게 고정되어 있으므로 제외한다.
+# 행 안에서만 찾도록 </tr>을 넘지 않으며, 셀 앞뒤 공백은 정규식에서 걸러 낸다
+ROW_RE = re.compile(
+    r'<tr\b[^>]*\bclass="(?:[^"]*\s)?ub-content\b[^"]*"[^>]*>'
+    r'[^<]*(?:<(?!/tr>)[^<]*)*?'
+    r'<td[^>]*?\bclass="gall_num"[^>]*>\s*\d+\s*</td>'
+    r'[^<]*(?:<(?!/tr>)[^<]*)*?'
+    r'<td[^>]*?\bclass="gall_date"[^>]*?(?:\btitle="(\S*)[^"]*"[^>]*)?>\s*([^<]*?)\s*</td>'
+)
+# BeautifulSoup으로 읽을 때도 게시글 행만 트리로 만든다
+ROW_FILTER = SoupStrainer("tr", class_="ub-content")
+
+# 같은 날 다시 조회하면 받아 둔 페이지를 재사용 (디스크 SQLite 캐시).
+# 만료된 응답에 ETag/Last-Modified가 있으면 If-None-Match/If-Modified-Since로 재검증하고
+# 304를 받으면 저장된 본문을 그대로 쓴다.
+CACHE_NAME = ".dc_cache"
+CACHE_TTL = dt.timedelta(hours=1)
+
+# 브랜드 x 페이지 동시 요청 수만큼 커넥션을 유지 (기본값 10이면 풀이 가득 차 연결을 버림)
+POOL_SIZE = max(len(BRANDS) * PAGE_CONCURRENCY, 32)
+
+
+class PageFetchError(Exception):
+    """페이지 요청이 실패했을 때 사용자에게 보여줄 메시지를 담는 예외."""
+
+
+class NoRowsError(PageFetchError):
+    """응답은 200이지만 게시글 행이 없을 때. 구조 변경이나 차단 페이지일 수 있어 수집을 멈춘다."""
+
+
+def _cache_resource(func):
+    # streamlit은 스크립트를 매번 다시 실행하므로 세션 등은 st.cache_resource로 유지
+    if st is not None:
+        return st.cache_resource(func)
+
+    # streamlit이 없으면 프로세스당 한 번만 생성. 여러 작업 스레드가 동시에 처음 호출해도
+    # 인스턴스가 하나만 만들어지도록 잠금으로 감싼다
+    lock = threading.Lock()
+    instance = []
+
+    @wraps(func)
+    def wrapper():
+        with lock:
+            if not instance:
+                instance.append(func())
+            return instance[0]
+
+    return wrapper
+
+
+def _cache_data(**kwargs):
+    def decorator(func):
+        if st is None:
+            return func
+        return st.cache_data(**kwargs)(func)
+
+    return decorator
 
 
+def _make_executor(max_workers: int) -> ThreadPoolExecutor:
+    """호출한 스레드의 streamlit 스크립트 컨텍스트를 작업 스레드에도 붙인 ThreadPoolExecutor.
+
+    컨텍스트가 없으면 작업 스레드에서 st.cache_* 를 부를 때마다 "missing ScriptRunContext" 경고가 난다.
+    """
+    ctx = get_script_run_ctx() if st is not None else None
+    if ctx is None:
+        return ThreadPoolExecutor(max_workers=max_workers)
+    return ThreadPoolExecutor(
+        max_workers=max_workers,
+        initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx),
+    )
+
+
+class TokenBucket:
+    """초당 rate개 요청을 허용하고 burst개까지는 몰아서 보낼 수 있는 요청 속도 제한기.
+
+    429/503을 받으면 속도를 절반으로 줄이고, 정상 응답이 이어지면 조금씩 되돌린다.
+    """
+
+    def __init__(self, rate: float, burst: int, min_rate: float = 0.5):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait_sec = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait_sec:
+            time.sleep(wait_sec)
+
+    def slow_down(self, retry_after: float | None = None):
+        with self.lock:
+            self.rate = max(self.rate / 2, self.min_rate)
+        time.sleep(retry_after if retry_after is not None else 1.0)
+
+    def speed_up(self):
+        with self.lock:
+            self.rate = min(self.rate + 0.1, self.burst)
+
+
+@_cache_resource
+def get_session() -> requests.Session:
+    """연결 풀과 디스크 캐시를 재실행 사이에도 재사용하는 공용 세션."""
+    session = requests_cache.CachedSession(CACHE_NAME, backend="sqlite", expire_after=CACHE_TTL)
+    session.headers.update(HEADERS)
+    session.mount(
+        "https://",
+        HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, pool_block=False, max_retries=RETRY_STRATEGY),
+    )
+    session.mount(
+        "http://",
+        HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE, pool_block=False, max_retries=RETRY_STRATEGY),
+    )
+    return session
+
+
+@_cache_resource
+def get_rate_limiter() -> TokenBucket:
+    """모든 브랜드가 같은 서버로 요청하므로 버킷 하나를 공유."""
+    return TokenBucket(rate=4.0, burst=8)
+
+
+@lru_cache(maxsize=4096)
 def normalize_date(text: str, today: dt.date) -> dt.date | None:
-    text = text.strip()
     if " " in text:
         text = text.split(" ")[0]
 
-    if text in ("오늘",):
+    if text in TODAY_STRINGS:
         return today
-    if text in ("어제",):
-        return today - dt.timedelta(days=1)
+    if text in YESTERDAY_STRINGS:
+        return today - _ONE_DAY
 
     if ":" in text:
         return today
 
-    for fmt in ("%Y.%m.%d", "%y.%m.%d", "%m.%d", "%m/%d", "%Y-%m-%d"):
+    # 자주 나오는 모양(MM.DD, YY.MM.DD, YYYY.MM.DD, YYYY-MM-DD)은 strptime 없이 바로 변환
+    try:
+        size = len(text)
+        if size == 5 and text[2] in "./":
+            return dt.date(today.year, int(text[0:2]), int(text[3:5]))
+        if size == 8 and text[2] == "." and text[5] == ".":
+            year = int(text[0:2])
+            year += 2000 if year < 69 else 1900  # strptime %y와 같은 기준
+            return dt.date(year, int(text[3:5]), int(text[6:8]))
+        if size == 10 and text[4] in ".-" and text[7] == text[4]:
+            return dt.date(int(text[0:4]), int(text[5:7]), int(text[8:10]))
+    except ValueError:
+        pass
+
+    for fmt in _DATE_FMTS:
         try:
-            parsed = dt.datetime.strptime(text, fmt)
-            if fmt in ("%m.%d", "%m/%d"):
+            parsed = _strptime(text, fmt)
+            if fmt in _YEARLESS:
                 parsed = parsed.replace(year=today.year)
             return parsed.date()
         except ValueError:
@@ -62,6 +223,99 @@ def normalize_date(text: str, today: dt.date) -> dt.date | None:
     return None
 
 
+def _cache_expiry() -> dt.datetime:
+    """캐시 만료 시각. 'HH:MM' 표기는 날짜가 바뀌면 어제가 되므로 자정을 넘기지 않는다."""
+    now = dt.datetime.now().astimezone()
+    midnight = dt.datetime.combine(now.date() + _ONE_DAY, dt.time(), tzinfo=now.tzinfo)
+    return min(now + CACHE_TTL, midnight)
+
+
+def _fetch_page(keyword, page, timeout, stop: threading.Event | None = None) -> requests.Response:
+    """검색 결과 한 페이지의 응답을 반환. 실패하거나 stop이 설정되면 PageFetchError."""
+    params = {
+        "id": "pizza",
+        "s_type": "search_subject_memo",
+        "s_keyword": keyword,
+        "page": page,
+    }
+
+    session = get_session()
+    bucket = get_rate_limiter()
+
+    expire_after = _cache_expiry()
+    cached = session.get(BASE_URL, params=params, only_if_cached=True)
+    if cached.status_code == 200:
+        return cached  # 캐시 적중은 서버 요청이 아니므로 속도 제한 대상 아님
+
+    for _ in range(THROTTLE_RETRIES + 1):
+        # 수집이 이미 끝났으면 토큰을 쓰거나 서버에 요청하지 않음 (acquire 대기 중에 끝날 수도 있음)
+        if stop is not None and stop.is_set():
+            raise PageFetchError(f"[{keyword}] page {page} skipped: sweep stopped")
+        bucket.acquire()
+        if stop is not None and stop.is_set():
+            raise PageFetchError(f"[{keyword}] page {page} skipped: sweep stopped")
+        try:
+            res = session.get(BASE_URL, params=params, timeout=timeout, expire_after=expire_after)
+        except requests.exceptions.ReadTimeout:
+            raise PageFetchError(f"[{keyword}] page {page} request timed out (read {timeout[1]}s), skipped")
+        except requests.exceptions.RequestException as exc:
+            time.sleep(1.0)
+            raise PageFetchError(f"[{keyword}] page {page} request failed: {exc}")
+        if res.status_code not in (429, 503):
+            break
+        # 속도를 줄이고 기다린 뒤 같은 페이지를 다시 요청 (페이지를 건너뛰면 그날 집계가 빠짐)
+        retry_after = res.headers.get("Retry-After", "")
+        bucket.slow_down(float(retry_after) if retry_after.isdigit() else None)
+
+    if res.status_code in (429, 503):
+        raise PageFetchError(f"[{keyword}] request failed: status {res.status_code} after {THROTTLE_RETRIES} retries")
+    if res.status_code != 200:
+        time.sleep(1.0)
+        raise PageFetchError(f"[{keyword}] request failed: status {res.status_code}")
+    bucket.speed_up()
+    return res
+
+
+def _extract_date_texts(html: bytes) -> list[str] | None:
+    """페이지의 작성일 문자열 목록을 반환. 게시글 행이 없으면 None."""
+    # 셀마다 디코딩하지 않도록 페이지 전체를 한 번만 디코딩
+    page = html.decode("utf-8", "replace")
+
+    # title 속성의 날짜(YYYY-MM-DD)가 있으면 그것을, 없으면 셀 텍스트를 사용
+    texts = [title or text for title, text in ROW_RE.findall(page)]
+    if texts:
+        return texts
+
+    # 정규식이 하나도 못 찾으면 마크업이 바뀐 것일 수 있으니 BeautifulSoup으로 다시 확인
+    soup = BeautifulSoup(page, "lxml", parse_only=ROW_FILTER)
+    rows = soup.find_all("tr", class_="ub-content")
+    if not rows:
+        return None
+    texts = []
+    for row in rows:
+        num_tag = row.find("td", class_="gall_num")
+        date_tag = row.find("td", class_="gall_date")
+        if num_tag and not num_tag.get_text(strip=True).isdigit():
+            continue  # 공지/설문 등 고정 행
+        if date_tag:
+            # 정규식 경로와 같은 값: title의 날짜 부분, 없으면 셀 텍스트
+            title = date_tag.get("title", "").split()
+            texts.append(title[0] if title else date_tag.get_text(strip=True))
+    return texts
+
+
+@_cache_data(ttl=3600, show_spinner=False)
+def fetch_page_dates(keyword, page, day_ordinal, _timeout=REQUEST_TIMEOUT, _stop=None) -> list[str]:
+    """페이지의 작성일 문자열 목록. day_ordinal이 캐시 키에 들어가 날짜가 바뀌면 새로 받는다."""
+    res = _fetch_page(keyword, page, _timeout, _stop)
+    date_texts = _extract_date_texts(res.content)
+    if date_texts is None:
+        # 일시적인 차단/캡차 페이지가 한 시간 동안 재사용되지 않도록 어느 캐시에도 남기지 않음
+        get_session().cache.delete(res.cache_key)
+        raise NoRowsError(f"[{keyword}] 행을 찾지 못했습니다 (page {page}). HTML 구조 변경 가능성.")
+    return date_texts
+
+
 def get_counts_in_range(
     keyword,
     start_date: dt.date,
@@ -71,77 +325,70 @@ def get_counts_in_range(
     progress_cb=None,
 ):
     """키워드별 지정 기간의 게시글 수를 일자별로 카운트."""
-    daily_count = defaultdict(int)
+    daily_count = Counter()  # date ordinal -> 게시글 수
     today = dt.date.today()
 
-    for page in range(1, max_page + 1):
-        msg = f"[{keyword}] 페이지 {page} 수집 중..."
-        print(msg)
-        if progress_cb:
-            progress_cb(msg)
+    futures = {}
+    stop = threading.Event()
+    executor = _make_executor(PAGE_CONCURRENCY)
 
-        params = {
-            "id": "pizza",
-            "s_type": "search_subject_memo",
-            "s_keyword": keyword,
-            "page": page,
-        }
+    def submit(page):
+        if page <= max_page:
+            futures[page] = executor.submit(fetch_page_dates, keyword, page, today.toordinal(), timeout, stop)
 
-        try:
-            res = SESSION.get(BASE_URL, params=params, timeout=timeout)
-        except requests.exceptions.ReadTimeout:
-            err_msg = f"[{keyword}] page {page} request timed out (read {timeout[1]}s), skipped"
-            print(err_msg)
-            if progress_cb:
-                progress_cb(err_msg)
-            continue
-        except requests.exceptions.RequestException as exc:
-            err_msg = f"[{keyword}] page {page} request failed: {exc}"
-            print(err_msg)
-            if progress_cb:
-                progress_cb(err_msg)
-            time.sleep(1.0)
-            continue
-        if res.status_code != 200:
-            err_msg = f"[{keyword}] request failed: status {res.status_code}"
-            print(err_msg)
-            if progress_cb:
-                progress_cb(err_msg)
-            time.sleep(1.0)
-            continue
-        soup = BeautifulSoup(res.text, "html.parser")
-        rows = soup.select("tr.ub-content")
-        if not rows:
-            print(f"[{keyword}] 행을 찾지 못했습니다 (page {page}). HTML 구조 변경 가능성.")
-            break
+    # 페이지 p를 소비해야 p + PAGE_CONCURRENCY를 요청하므로 앞서 받는 페이지는 최대 한 창(window).
+    # 각 작업 스레드가 받은 즉시 파싱까지 하므로 한 페이지의 파싱은 다른 페이지의 다운로드와 겹친다
+    try:
+        for page in range(1, PAGE_CONCURRENCY + 1):
+            submit(page)
 
-        parsed_dates = []
-
-        for row in rows:
-            date_tag = row.select_one(".gall_date")
-            if not date_tag:
+        for page in range(1, max_page + 1):
+            msg = f"[{keyword}] 페이지 {page} 수집 중..."
+            print(msg)
+            if progress_cb:
+                progress_cb(msg)
+
+            try:
+                date_texts = futures.pop(page).result()
+            except NoRowsError as exc:
+                print(exc)
+                break
+            except PageFetchError as exc:
+                print(exc)
+                if progress_cb:
+                    progress_cb(str(exc))
+                submit(page + PAGE_CONCURRENCY)
                 continue
 
-            parsed = normalize_date(date_tag.text, today)
-            if not parsed:
-                continue
+            in_range = []
+            reached_start = False
 
-            parsed_dates.append(parsed)
+            for text in date_texts:
+                parsed = normalize_date(text, today)
+                if not parsed:
+                    continue
 
-            if parsed < start_date:
-                continue  # 조회 시작 이전
-            if parsed > end_date:
-                continue  # 조회 종료 이후
+                # 목록은 최신순이므로 시작일 이전 글이 나오면 이후 행/페이지는 볼 필요 없음
+                if parsed < start_date:
+                    reached_start = True
+                    break
+                if parsed > end_date:
+                    continue  # 조회 종료 이후
 
-            daily_count[parsed.isoformat()] += 1
+                in_range.append(parsed.toordinal())
 
-        # 페이지 내 가장 오래된 날짜가 시작일보다 이전이면 종료
-        if parsed_dates and min(parsed_dates) < start_date:
-            break
+            daily_count.update(in_range)
+            if reached_start:
+                break
 
-        time.sleep(0.5)  # 차단 방지용 딜레이
+            submit(page + PAGE_CONCURRENCY)
+    finally:
+        # 남은 앞선 페이지는 기다리지 않음. 대기 중인 작업은 취소하고, 실행 중인 작업은 stop을 보고
+        # 다음 요청 전에 멈춘다
+        stop.set()
+        executor.shutdown(wait=False, cancel_futures=True)
 
-    return daily_count
+    return {dt.date.fromordinal(day).isoformat(): count for day, count in daily_count.items()}
 
 
 def fetch_counts(
@@ -152,24 +399,41 @@ def fetch_counts(
     timeout=REQUEST_TIMEOUT,
     progress_cb=None,
 ) -> pd.DataFrame:
-    all_data = []
+    # 브랜드별 수집은 동시에 진행하고, 진행 메시지는 큐에 모아 호출한 스레드에서 전달
+    messages = queue.Queue()
+    with _make_executor(max(len(brands), 1)) as executor:
+        futures = {}
+        for brand in brands:
+            if progress_cb:
+                progress_cb(f"[{brand}] 수집 시작")
+            futures[brand] = executor.submit(
+                get_counts_in_range,
+                brand,
+                start_date=start_date,
+                end_date=end_date,
+                max_page=max_page,
+                timeout=timeout,
+                progress_cb=messages.put if progress_cb else None,
+            )
+
+        pending = set(futures.values())
+        while pending:
+            _, pending = wait(pending, timeout=0.2)
+            while progress_cb and not messages.empty():
+                progress_cb(messages.get_nowait())
+
+    # 행 dict 대신 컬럼별 리스트로 모아 DataFrame을 한 번에 생성
+    brands_col, dates_col, counts_col = [], [], []
     for brand in brands:
-        if progress_cb:
-            progress_cb(f"[{brand}] 수집 시작")
-        result = get_counts_in_range(
-            brand,
-            start_date=start_date,
-            end_date=end_date,
-            max_page=max_page,
-            timeout=timeout,
-            progress_cb=progress_cb,
-        )
-        for day, count in result.items():
-            all_data.append({"brand": brand, "date": day, "count": count})
+        result = futures[brand].result()
+        brands_col.extend([brand] * len(result))
+        dates_col.extend(result.keys())
+        counts_col.extend(result.values())
 
-    df = pd.DataFrame(all_data)
+    df = pd.DataFrame({"brand": brands_col, "date": pd.to_datetime(dates_col), "count": counts_col})
     if df.empty:
         return df
+    df = df.astype({"brand": "category", "count": "int32"})
     return df.sort_values(by=["date", "brand"])
 
 
@@ -233,17 +497,15 @@ def run_streamlit():
             st.warning("수집된 데이터가 없습니다. 검색 키워드나 페이지 수를 늘려보세요.")
             return
 
-        pivot = (
-            df.pivot_table(index="date", columns="brand", values="count", fill_value=0)
-            .sort_index()
-        )
+        # (date, brand) 쌍이 유일하므로 집계 없이 바로 펼침
+        pivot = df.set_index(["date", "brand"])["count"].unstack("brand", fill_value=0).sort_index()
 
         st.subheader("일자별 브랜드별 게시글 수")
-        st.dataframe(pivot, use_container_width=True)
+        st.dataframe(pivot.set_axis(pivot.index.strftime("%Y-%m-%d")), use_container_width=True)
 
         st.subheader("추이 그래프")
         chart_data = pivot.reset_index().melt("date", var_name="brand", value_name="count")
-        chart_data["date_str"] = pd.to_datetime(chart_data["date"]).dt.strftime("%m/%d")
+        chart_data["date_str"] = chart_data["date"].dt.strftime("%m/%d")
 
         chart = (
             alt.Chart(chart_data)